@@ -86,6 +86,13 @@ class Batch(object):
     def get_origin_len(self, key):
         return self.origin_len[key]
 
+    def _is_tensor_list(self, key):
+        """
+        特征是否是由 Tensor 组成的 list（例如数据集已经提前转换成了 Tensor），此时直接 stack 即可
+        """
+        return isinstance(self.data[key], list) and len(self.data[key]) > 0 \
+            and isinstance(self.data[key][0], torch.Tensor)
+
     def to_tensor(self, device):
         """
         将数据self.data转移到device上
@@ -95,9 +102,15 @@ class Batch(object):
         """
         for key in self.data:
             if self.feature_name[key] == 'int':
-                self.data[key] = torch.LongTensor(np.array(self.data[key])).to(device)
+                if self._is_tensor_list(key):
+                    self.data[key] = torch.stack(self.data[key]).long().to(device)
+                else:
+                    self.data[key] = torch.LongTensor(np.array(self.data[key])).to(device)
             elif self.feature_name[key] == 'float':
-                self.data[key] = torch.FloatTensor(np.array(self.data[key])).to(device)
+                if self._is_tensor_list(key):
+                    self.data[key] = torch.stack(self.data[key]).float().to(device)
+                else:
+                    self.data[key] = torch.FloatTensor(np.array(self.data[key])).to(device)
             elif self.feature_name[key] == 'array of int':
                 for i in range(len(self.data[key])):
                     for j in range(len(self.data[key][i])):
@@ -121,7 +134,9 @@ class Batch(object):
 
     def to_ndarray(self):
         for key in self.data:
-            if self.feature_name[key] == 'int':
+            if self.feature_name[key] in ('int', 'float') and self._is_tensor_list(key):
+                self.data[key] = torch.stack(self.data[key]).cpu().numpy()
+            elif self.feature_name[key] == 'int':
                 self.data[key] = np.array(self.data[key])
             elif self.feature_name[key] == 'float':
                 self.data[key] = np.array(self.data[key])
@@ -1,7 +1,6 @@
 import os
 import numpy as np
 from scipy.spatial.distance import cdist
-from libcity.utils import ensure_dir
 from libcity.data.dataset import TrafficStatePointDataset
 # from libcity.data.dataset import TrafficStateGridDataset
 
@@ -110,9 +109,7 @@ class CCRNNDataset(TrafficStatePointDataset):
 
         self.adj_mx = self._generate_graph_with_data(data=df, len=num_train)
         if self.cache_dataset:
-            ensure_dir(self.cache_file_folder)
-            np.savez_compressed(
-                self.cache_file_name,
+            self._save_cache(
                 x_train=x_train,
                 y_train=y_train,
                 x_test=x_test,
@@ -121,7 +118,6 @@ class CCRNNDataset(TrafficStatePointDataset):
                 y_val=y_val,
                 adj_mx=self.adj_mx
             )
-            self._logger.info('Saved at ' + self.cache_file_name)
         return x_train, y_train, x_val, y_val, x_test, y_test
 
     def _generate_train_val_test(self):
@@ -154,7 +150,7 @@ class CCRNNDataset(TrafficStatePointDataset):
                 y_test: (num_samples, input_length, ..., feature_dim)
         """
         self._logger.info('Loading ' + self.cache_file_name)
-        cat_data = np.load(self.cache_file_name)
+        cat_data = self._load_cache()
         x_train = cat_data['x_train']
         y_train = cat_data['y_train']
         x_test = cat_data['x_test']
@@ -1,7 +1,6 @@
 import os
 import numpy as np
 from libcity.data.dataset import TrafficStatePointDataset
-from libcity.utils import ensure_dir
 from libcity.data.utils import generate_dataloader
 
 """
@@ -77,9 +76,7 @@ class CRANNDataset(TrafficStatePointDataset):
                           + ", x_ext: " + str(x_ext_test.shape) + ", y: " + str(y_test.shape))
 
         if self.cache_dataset:
-            ensure_dir(self.cache_file_folder)
-            np.savez_compressed(
-                self.cache_file_name,
+            self._save_cache(
                 x_time_train=x_time_train,
                 x_space_train=x_space_train,
                 x_ext_train=x_ext_train,
@@ -93,7 +90,6 @@ class CRANNDataset(TrafficStatePointDataset):
                 y_val=y_val,
                 y_test=y_test,
             )
-            self._logger.info('Saved at ' + self.cache_file_name)
         return x_time_train, x_space_train, x_ext_train, y_train, x_time_val, x_space_val, x_ext_val, y_val, \
                x_time_test, x_space_test, x_ext_test, y_test
 
@@ -103,7 +99,7 @@ class CRANNDataset(TrafficStatePointDataset):
 
     def _load_cache_train_val_test(self):
         self._logger.info('Loading ' + self.cache_file_name)
-        cat_data = np.load(self.cache_file_name)
+        cat_data = self._load_cache()
         x_time_train = cat_data['x_time_train']
         x_space_train = cat_data['x_space_train']
         x_ext_train = cat_data['x_ext_train']
@@ -140,7 +136,7 @@ class CRANNDataset(TrafficStatePointDataset):
         # 数据归一化
         self.feature_dim = x_time_train.shape[-1]
         self.ext_dim = x_ext_train.shape[-1]
-        self.scaler = self._get_scalar(self.scaler_type, x_space_train, y_train)
+        self.scaler = self._get_scalar(self.scaler_type, x_space_train)
         x_time_train[..., :self.output_dim] = self.scaler.transform(x_time_train[..., :self.output_dim])
         x_space_train[..., :self.output_dim] = self.scaler.transform(x_space_train[..., :self.output_dim])
         x_ext_train[..., :self.output_dim] = self.scaler.transform(x_ext_train[..., :self.output_dim])
@@ -144,9 +144,10 @@ class HGCNDataset(TrafficStateDataset):
         self._logger.info("Start Calculate the adj_max_cluster!")
 
         centers_groups, centers_ind_groups = self.get_cluster()
-        self.adj_mx_cluster = np.zeros((self.cluster_nodes, self.cluster_nodes), dtype=np.float32)
         if self.init_weight_inf_or_zero.lower() == 'inf':
-            self.adj_mx_cluster[:] = np.inf
+            self.adj_mx_cluster = np.full((self.cluster_nodes, self.cluster_nodes), np.inf, dtype=np.float32)
+        else:
+            self.adj_mx_cluster = np.zeros((self.cluster_nodes, self.cluster_nodes), dtype=np.float32)
         for i in range(self.cluster_nodes):
             for j in range(self.cluster_nodes):
                 cluster_sum = 0
@@ -4,7 +4,7 @@ import pandas as pd
 
 from libcity.data.dataset import TrafficStateDataset
 from libcity.data.utils import generate_dataloader
-from libcity.utils import StandardScaler, NormalScaler, NoneScaler, MinMax01Scaler, MinMax11Scaler, ensure_dir
+from libcity.utils import StandardScaler, NormalScaler, NoneScaler, MinMax01Scaler, MinMax11Scaler
 
 
 class STDNDataset(TrafficStateDataset):
@@ -396,9 +396,7 @@ class STDNDataset(TrafficStateDataset):
                 flow_inputs_test.shape) + "lstm_inputs: " + str(lstm_inputs_test.shape))
 
         if self.cache_dataset:
-            ensure_dir(self.cache_file_folder)
-            np.savez_compressed(
-                self.cache_file_name,
+            self._save_cache(
                 x_train=x_train,
                 y_train=y_train,
                 flatten_att_nbhd_inputs_train=flatten_att_nbhd_inputs_train,
@@ -424,7 +422,6 @@ class STDNDataset(TrafficStateDataset):
                 flow_inputs_val=flow_inputs_val,
                 lstm_inputs_val=lstm_inputs_val,
             )
-            self._logger.info('Saved at ' + self.cache_file_name)
         return x_train, y_train, flatten_att_nbhd_inputs_train, flatten_att_flow_inputs_train, att_lstm_inputs_train, nbhd_inputs_train, flow_inputs_train, lstm_inputs_train, \
                x_val, y_val, flatten_att_nbhd_inputs_val, flatten_att_flow_inputs_val, att_lstm_inputs_val, nbhd_inputs_val, flow_inputs_val, lstm_inputs_val, \
                x_test, y_test, flatten_att_nbhd_inputs_test, flatten_att_flow_inputs_test, att_lstm_inputs_test, nbhd_inputs_test, flow_inputs_test, lstm_inputs_test
@@ -442,7 +439,7 @@ class STDNDataset(TrafficStateDataset):
         加载之前缓存好的训练集、测试集、验证集
         """
         self._logger.info('Loading ' + self.cache_file_name)
-        cat_data = np.load(self.cache_file_name)
+        cat_data = self._load_cache()
         x_train = cat_data['x_train']
         y_train = cat_data['y_train']
         flatten_att_nbhd_inputs_train = cat_data['flatten_att_nbhd_inputs_train']
@@ -20,9 +20,10 @@ class TGCLSTMDataset(TrafficStatePointDataset):
         else:
             raise ValueError("Don't know which column to be loaded! Please set `weight_col` parameter!")
         # 把数据转换成矩阵的形式
-        self.adj_mx = np.zeros((len(self.geo_ids), len(self.geo_ids)), dtype=np.float32)
         if self.init_weight_inf_or_zero.lower() == 'inf':
-            self.adj_mx[:] = np.inf
+            self.adj_mx = np.full((len(self.geo_ids), len(self.geo_ids)), np.inf, dtype=np.float32)
+        else:
+            self.adj_mx = np.zeros((len(self.geo_ids), len(self.geo_ids)), dtype=np.float32)
         for row in self.distance_df.values:
             if row[0] not in self.geo_to_ind or row[1] not in self.geo_to_ind:
                 continue
@@ -33,8 +34,7 @@ class TGCLSTMDataset(TrafficStatePointDataset):
         self._logger.info("Loaded file " + self.dataset + '.rel')
         # 得到可达性矩阵
         for i in range(3, 8):
-            ffr_mx = np.zeros((len(self.geo_ids), len(self.geo_ids)), dtype=np.float32)
-            ffr_mx[:] = np.inf
+            ffr_mx = np.full((len(self.geo_ids), len(self.geo_ids)), np.inf, dtype=np.float32)
             for row in self.distance_df.values:
                 if row[0] not in self.geo_to_ind or row[1] not in self.geo_to_ind:
                     continue
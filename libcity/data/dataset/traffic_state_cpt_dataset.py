@@ -1,11 +1,9 @@
 import os
 import sys
 import numpy as np
-import datetime
 
 from libcity.data.dataset import TrafficStateDataset
 from libcity.data.utils import generate_dataloader
-from libcity.utils import ensure_dir
 
 
 class TrafficStateCPTDataset(TrafficStateDataset):
@@ -149,9 +147,8 @@ class TrafficStateCPTDataset(TrafficStateDataset):
             time_ind = (timestamp_list - timestamp_list.astype("datetime64[D]")) / np.timedelta64(1, "D")
             data_list.append(time_ind.reshape(time_ind.shape[0], 1))
         if self.add_day_in_week:
-            dayofweek = []
-            for day in timestamp_list.astype("datetime64[D]"):
-                dayofweek.append(datetime.datetime.strptime(str(day), '%Y-%m-%d').weekday())
+            # 1970-01-01是星期四，由距其的天数直接得到星期几(0表示星期一)
+            dayofweek = (timestamp_list.astype("datetime64[D]").astype(np.int64) + 3) % 7
             day_in_week = np.zeros(shape=(len(timestamp_list), 7))
             day_in_week[np.arange(len(timestamp_list)), dayofweek] = 1
             data_list.append(day_in_week)
@@ -293,9 +290,7 @@ class TrafficStateCPTDataset(TrafficStateDataset):
                           + ", x_ext: " + str(ext_x_test.shape) + ", y_ext: " + str(ext_y_test.shape))
 
         if self.cache_dataset:
-            ensure_dir(self.cache_file_folder)
-            np.savez_compressed(
-                self.cache_file_name,
+            self._save_cache(
                 x_train=x_train, y_train=y_train,
                 x_test=x_test, y_test=y_test,
                 x_val=x_val, y_val=y_val,
@@ -303,7 +298,6 @@ class TrafficStateCPTDataset(TrafficStateDataset):
                 ext_x_test=ext_x_test, ext_y_test=ext_y_test,
                 ext_x_val=ext_x_val, ext_y_val=ext_y_val,
             )
-            self._logger.info('Saved at ' + self.cache_file_name)
         return x_train, y_train, x_val, y_val, x_test, y_test, \
             ext_x_train, ext_y_train, ext_x_test, ext_y_test, ext_x_val, ext_y_val
 
@@ -349,7 +343,7 @@ class TrafficStateCPTDataset(TrafficStateDataset):
                 ext_y_test: (num_samples, ext_dim)
         """
         self._logger.info('Loading ' + self.cache_file_name)
-        cat_data = np.load(self.cache_file_name)
+        cat_data = self._load_cache()
         x_train = cat_data['x_train']
         y_train = cat_data['y_train']
         x_test = cat_data['x_test']
@@ -397,10 +391,8 @@ class TrafficStateCPTDataset(TrafficStateDataset):
         # 数据归一化
         self.feature_dim = x_train.shape[-1]
         self.ext_dim = ext_x_train.shape[-1]
-        self.scaler = self._get_scalar(self.scaler_type,
-                                       x_train[..., :self.output_dim], y_train[..., :self.output_dim])
-        self.ext_scaler = self._get_scalar(self.ext_scaler_type,
-                                           x_train[..., self.output_dim:], y_train[..., self.output_dim:])
+        self.scaler = self._get_scalar(self.scaler_type, x_train[..., :self.output_dim])
+        self.ext_scaler = self._get_scalar(self.ext_scaler_type, x_train[..., self.output_dim:])
         x_train = self.scaler.transform(x_train)
         y_train = self.scaler.transform(y_train)
         x_val = self.scaler.transform(x_val)
@@ -1,11 +1,12 @@
 import os
+import torch
 import pandas as pd
 import numpy as np
-import datetime
 from logging import getLogger
 
 from libcity.data.dataset import AbstractDataset
 from libcity.data.utils import generate_dataloader
+from libcity.data.list_dataset import ArrayDataset
 from libcity.utils import StandardScaler, NormalScaler, NoneScaler, \
     MinMax01Scaler, MinMax11Scaler, LogScaler, ensure_dir
 
@@ -62,10 +63,13 @@ class TrafficStateDataset(AbstractDataset):
         self.set_weight_link_or_dist = self.config.get('set_weight_link_or_dist', 'dist')
         self.calculate_weight_adj = self.config.get('calculate_weight_adj', False)
         self.weight_adj_epsilon = self.config.get('weight_adj_epsilon', 0.1)
+        self.load_data_to_device = self.config.get('load_data_to_device', False)
+        self.device = self.config.get('device', torch.device('cpu'))
         # 初始化
         self.data = None
         self.feature_name = {'X': 'float', 'y': 'float'}  # 此类的输入只有X和y
         self.adj_mx = None
+        self.geo_to_ind_arr = None
         self.scaler = None
         self.ext_scaler = None
         self.feature_dim = 0
@@ -73,6 +77,11 @@ class TrafficStateDataset(AbstractDataset):
         self.num_nodes = 0
         self.num_batches = 0
         self._logger = getLogger()
+        if self.load_data_to_device and self.device.type != 'cpu' and self.num_workers > 0:
+            # 数据集已经在显存上时，DataLoader的子进程无法访问CUDA Tensor
+            self._logger.warning('`load_data_to_device` is set on device {}, force `num_workers` from {} to 0'
+                                 .format(self.device, self.num_workers))
+            self.num_workers = 0
         if os.path.exists(self.data_path + self.geo_file + '.geo'):
             self._load_geo()
         else:
@@ -92,6 +101,7 @@ class TrafficStateDataset(AbstractDataset):
         self.geo_to_ind = {}
         for index, idx in enumerate(self.geo_ids):
             self.geo_to_ind[idx] = index
+        self._build_geo_to_ind_arr()
         self._logger.info("Loaded file " + self.geo_file + '.geo' + ', num_nodes=' + str(len(self.geo_ids)))
 
     def _load_grid_geo(self):
@@ -105,6 +115,7 @@ class TrafficStateDataset(AbstractDataset):
         self.geo_to_rc = {}
         for index, idx in enumerate(self.geo_ids):
             self.geo_to_ind[idx] = index
+        self._build_geo_to_ind_arr()
         for i in range(geofile.shape[0]):
             self.geo_to_rc[geofile['geo_id'][i]] = [geofile['row_id'][i], geofile['column_id'][i]]
         self.len_row = max(list(geofile['row_id'])) + 1
@@ -112,6 +123,37 @@ class TrafficStateDataset(AbstractDataset):
         self._logger.info("Loaded file " + self.geo_file + '.geo' + ', num_grids=' + str(len(self.geo_ids))
                           + ', grid_size=' + str((self.len_row, self.len_column)))
 
+    def _build_geo_to_ind_arr(self):
+        """
+        当geo_id是比较稠密的非负整数时，额外构建数组形式的geo_id到下标的映射self.geo_to_ind_arr，
+        用于向量化地查找下标，不在.geo文件中的geo_id对应-1，否则self.geo_to_ind_arr为None
+        """
+        geo_ids = np.array(self.geo_ids)
+        if len(geo_ids) > 0 and np.issubdtype(geo_ids.dtype, np.integer) \
+                and geo_ids.min() >= 0 and geo_ids.max() < 10 * len(geo_ids):
+            self.geo_to_ind_arr = np.full(geo_ids.max() + 1, -1, dtype=np.int64)
+            self.geo_to_ind_arr[geo_ids] = np.arange(len(geo_ids))
+        else:
+            self.geo_to_ind_arr = None
+
+    def _geo_ids_to_ind(self, ids):
+        """
+        将一列geo_id批量映射为矩阵下标，优先使用self.geo_to_ind_arr，否则使用self.geo_to_ind
+
+        Args:
+            ids(pd.Series): geo_id序列
+
+        Returns:
+            np.ndarray: 下标数组，不在.geo文件中的geo_id对应-1
+        """
+        if self.geo_to_ind_arr is not None and np.issubdtype(ids.dtype, np.integer):
+            ids = ids.values
+            ind = np.full(len(ids), -1, dtype=np.int64)
+            valid = (ids >= 0) & (ids < len(self.geo_to_ind_arr))
+            ind[valid] = self.geo_to_ind_arr[ids[valid]]
+            return ind
+        return ids.map(self.geo_to_ind).fillna(-1).values.astype(np.int64)
+
     def _load_rel(self):
         """
         加载.rel文件，格式[rel_id, type, origin_id, destination_id, properties(若干列)],
@@ -123,7 +165,6 @@ class TrafficStateDataset(AbstractDataset):
         Returns:
             np.ndarray: self.adj_mx, N*N的邻接矩阵
         """
-        relfile = pd.read_csv(self.data_path + self.rel_file + '.rel')
         self._logger.info('set_weight_link_or_dist: {}'.format(self.set_weight_link_or_dist))
         self._logger.info('init_weight_inf_or_zero: {}'.format(self.init_weight_inf_or_zero))
         if self.weight_col != '':  # 根据weight_col确认权重列
@@ -131,26 +172,33 @@ class TrafficStateDataset(AbstractDataset):
                 if len(self.weight_col) != 1:
                     raise ValueError('`weight_col` parameter must be only one column!')
                 self.weight_col = self.weight_col[0]
-            self.distance_df = relfile[~relfile[self.weight_col].isna()][[
-                'origin_id', 'destination_id', self.weight_col]]
         else:
-            if len(relfile.columns) != 5:  # properties不只一列，且未指定weight_col，报错
+            rel_columns = pd.read_csv(self.data_path + self.rel_file + '.rel', nrows=0).columns  # 只读表头
+            if len(rel_columns) != 5:  # properties不只一列，且未指定weight_col，报错
                 raise ValueError("Don't know which column to be loaded! Please set `weight_col` parameter!")
             else:  # properties只有一列，那就默认这一列是权重列
-                self.weight_col = relfile.columns[-1]
-                self.distance_df = relfile[~relfile[self.weight_col].isna()][[
-                    'origin_id', 'destination_id', self.weight_col]]
+                self.weight_col = rel_columns[-1]
+        # 只解析需要的三列
+        relfile = pd.read_csv(self.data_path + self.rel_file + '.rel',
+                              usecols=['origin_id', 'destination_id', self.weight_col],
+                              dtype={self.weight_col: np.float32})
+        self.distance_df = relfile[~relfile[self.weight_col].isna()][[
+            'origin_id', 'destination_id', self.weight_col]]
         # 把数据转换成矩阵的形式
-        self.adj_mx = np.zeros((len(self.geo_ids), len(self.geo_ids)), dtype=np.float32)
         if self.init_weight_inf_or_zero.lower() == 'inf' and self.set_weight_link_or_dist.lower() != 'link':
-            self.adj_mx[:] = np.inf
-        for row in self.distance_df.values:
-            if row[0] not in self.geo_to_ind or row[1] not in self.geo_to_ind:
-                continue
-            if self.set_weight_link_or_dist.lower() == 'dist':  # 保留原始的距离数值
-                self.adj_mx[self.geo_to_ind[row[0]], self.geo_to_ind[row[1]]] = row[2]
-            else:  # self.set_weight_link_or_dist.lower()=='link' 只保留01的邻接性
-                self.adj_mx[self.geo_to_ind[row[0]], self.geo_to_ind[row[1]]] = 1
+            self.adj_mx = np.full((len(self.geo_ids), len(self.geo_ids)), np.inf, dtype=np.float32)
+        else:
+            self.adj_mx = np.zeros((len(self.geo_ids), len(self.geo_ids)), dtype=np.float32)
+        # 将origin_id/destination_id批量映射为矩阵下标，跳过不在.geo文件中的节点
+        origin_ind = self._geo_ids_to_ind(self.distance_df['origin_id'])
+        destination_ind = self._geo_ids_to_ind(self.distance_df['destination_id'])
+        mask = (origin_ind >= 0) & (destination_ind >= 0)
+        origin_ind = origin_ind[mask]
+        destination_ind = destination_ind[mask]
+        if self.set_weight_link_or_dist.lower() == 'dist':  # 保留原始的距离数值
+            self.adj_mx[origin_ind, destination_ind] = self.distance_df[self.weight_col].values[mask]
+        else:  # self.set_weight_link_or_dist.lower()=='link' 只保留01的邻接性
+            self.adj_mx[origin_ind, destination_ind] = 1
         self._logger.info("Loaded file " + self.rel_file + '.rel, shape=' + str(self.adj_mx.shape))
         # 计算权重
         if self.calculate_weight_adj:
@@ -187,9 +235,12 @@ class TrafficStateDataset(AbstractDataset):
             np.ndarray: self.adj_mx, N*N的邻接矩阵
         """
         self._logger.info("Start Calculate the weight by Gauss kernel!")
-        distances = self.adj_mx[~np.isinf(self.adj_mx)].flatten()
-        std = distances.std()
-        self.adj_mx = np.exp(-np.square(self.adj_mx / std))
+        std = self.adj_mx[~np.isinf(self.adj_mx)].std()
+        # 原地计算，避免每一步都分配N*N的临时矩阵
+        self.adj_mx /= std
+        np.square(self.adj_mx, out=self.adj_mx)
+        np.negative(self.adj_mx, out=self.adj_mx)
+        np.exp(self.adj_mx, out=self.adj_mx)
         self.adj_mx[self.adj_mx < self.weight_adj_epsilon] = 0
 
     def _load_dyna(self, filename):
@@ -220,16 +271,18 @@ class TrafficStateDataset(AbstractDataset):
         """
         # 加载数据集
         self._logger.info("Loading file " + filename + '.dyna')
-        dynafile = pd.read_csv(self.data_path + filename + '.dyna')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'entity_id')
-            dynafile = dynafile[data_col]
+            dynafile = pd.read_csv(self.data_path + filename + '.dyna', usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            dynafile = pd.read_csv(self.data_path + filename + '.dyna')
             dynafile = dynafile[dynafile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(dynafile['time'][:int(dynafile.shape[0] / len(self.geo_ids))])
@@ -241,13 +294,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
         # 转3-d数组
         feature_dim = len(dynafile.columns) - 2
-        df = dynafile[dynafile.columns[-feature_dim:]]
+        df = dynafile[dynafile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = []
-        for i in range(0, df.shape[0], len_time):
-            data.append(df[i:i+len_time].values)
-        data = np.array(data, dtype=np.float)  # (len(self.geo_ids), len_time, feature_dim)
-        data = data.swapaxes(0, 1)             # (len_time, len(self.geo_ids), feature_dim)
+        data = df.reshape(-1, len_time, feature_dim)  # (len(self.geo_ids), len_time, feature_dim)
+        data = data.swapaxes(0, 1)                    # (len_time, len(self.geo_ids), feature_dim)
         self._logger.info("Loaded file " + filename + '.dyna' + ', shape=' + str(data.shape))
         return data
 
@@ -265,17 +315,19 @@ class TrafficStateDataset(AbstractDataset):
         """
         # 加载数据集
         self._logger.info("Loading file " + filename + '.grid')
-        gridfile = pd.read_csv(self.data_path + filename + '.grid')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'row_id')
             data_col.insert(2, 'column_id')
-            gridfile = gridfile[data_col]
+            gridfile = pd.read_csv(self.data_path + filename + '.grid', usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            gridfile = pd.read_csv(self.data_path + filename + '.grid')
             gridfile = gridfile[gridfile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(gridfile['time'][:int(gridfile.shape[0] / len(self.geo_ids))])
@@ -287,13 +339,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
         # 转3-d数组
         feature_dim = len(gridfile.columns) - 3
-        df = gridfile[gridfile.columns[-feature_dim:]]
+        df = gridfile[gridfile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = []
-        for i in range(0, df.shape[0], len_time):
-            data.append(df[i:i + len_time].values)
-        data = np.array(data, dtype=np.float)  # (len(self.geo_ids), len_time, feature_dim)
-        data = data.swapaxes(0, 1)             # (len_time, len(self.geo_ids), feature_dim)
+        data = df.reshape(-1, len_time, feature_dim)  # (len(self.geo_ids), len_time, feature_dim)
+        data = data.swapaxes(0, 1)                    # (len_time, len(self.geo_ids), feature_dim)
         self._logger.info("Loaded file " + filename + '.grid' + ', shape=' + str(data.shape))
         return data
 
@@ -311,17 +360,19 @@ class TrafficStateDataset(AbstractDataset):
         """
         # 加载数据集
         self._logger.info("Loading file " + filename + '.grid')
-        gridfile = pd.read_csv(self.data_path + filename + '.grid')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'row_id')
             data_col.insert(2, 'column_id')
-            gridfile = gridfile[data_col]
+            gridfile = pd.read_csv(self.data_path + filename + '.grid', usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            gridfile = pd.read_csv(self.data_path + filename + '.grid')
             gridfile = gridfile[gridfile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(gridfile['time'][:int(gridfile.shape[0] / len(self.geo_ids))])
@@ -333,16 +384,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
         # 转4-d数组
         feature_dim = len(gridfile.columns) - 3
-        df = gridfile[gridfile.columns[-feature_dim:]]
+        df = gridfile[gridfile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = []
-        for i in range(self.len_row):
-            tmp = []
-            for j in range(self.len_column):
-                index = (i * self.len_column + j) * len_time
-                tmp.append(df[index:index + len_time].values)
-            data.append(tmp)
-        data = np.array(data, dtype=np.float)      # (len_row, len_column, len_time, feature_dim)
+        # 每个格子(i, j)按行优先顺序占据连续的len_time行
+        data = df.reshape(self.len_row, self.len_column, len_time, feature_dim)
         data = data.swapaxes(2, 0).swapaxes(1, 2)  # (len_time, len_row, len_column, feature_dim)
         self._logger.info("Loaded file " + filename + '.grid' + ', shape=' + str(data.shape))
         return data
@@ -360,17 +405,19 @@ class TrafficStateDataset(AbstractDataset):
                     np.ndarray: 数据数组, 4d-array: (len_time, len_row, len_column, feature_dim)
                 """
         self._logger.info("Loading file " + filename + '.od')
-        odfile = pd.read_csv(self.data_path + filename + '.od')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'origin_id')
             data_col.insert(2, 'destination_id')
-            odfile = odfile[data_col]
+            odfile = pd.read_csv(self.data_path + filename + '.od', usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            odfile = pd.read_csv(self.data_path + filename + '.od')
             odfile = odfile[odfile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(odfile['time'][:int(odfile.shape[0] / self.num_nodes / self.num_nodes)])
@@ -382,15 +429,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
 
         feature_dim = len(odfile.columns) - 3
-        df = odfile[odfile.columns[-feature_dim:]]
+        df = odfile[odfile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = np.zeros((self.num_nodes, self.num_nodes, len_time, feature_dim))
-        for i in range(self.num_nodes):
-            origin_index = i * len_time * self.num_nodes  # 每个起点占据len_t*n行
-            for j in range(self.num_nodes):
-                destination_index = j * len_time  # 每个终点占据len_t行
-                index = origin_index + destination_index
-                data[i][j] = df[index:index + len_time].values
+        # 每个起点占据len_t*n行，其中每个终点占据len_t行
+        data = df.reshape(self.num_nodes, self.num_nodes, len_time, feature_dim)
         data = data.transpose((2, 0, 1, 3))  # (len_time, num_nodes, num_nodes, feature_dim)
         self._logger.info("Loaded file " + filename + '.od' + ', shape=' + str(data.shape))
         return data
@@ -410,19 +452,22 @@ class TrafficStateDataset(AbstractDataset):
         """
         # 加载数据集
         self._logger.info("Loading file " + filename + '.gridod')
-        gridodfile = pd.read_csv(self.data_path + filename + '.gridod')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'origin_row_id')
             data_col.insert(2, 'origin_column_id')
             data_col.insert(3, 'destination_row_id')
             data_col.insert(4, 'destination_column_id')
-            gridodfile = gridodfile[data_col]
+            gridodfile = pd.read_csv(self.data_path + filename + '.gridod',
+                                     usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            gridodfile = pd.read_csv(self.data_path + filename + '.gridod')
             gridodfile = gridodfile[gridodfile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(gridodfile['time'][:int(gridodfile.shape[0] / len(self.geo_ids) / len(self.geo_ids))])
@@ -434,20 +479,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
         # 转4-d数组
         feature_dim = len(gridodfile.columns) - 5
-        df = gridodfile[gridodfile.columns[-feature_dim:]]
+        df = gridodfile[gridodfile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = np.zeros((len(self.geo_ids), len(self.geo_ids), len_time, feature_dim))
-        for oi in range(self.len_row):
-            for oj in range(self.len_column):
-                origin_index = (oi * self.len_column + oj) * len_time * len(self.geo_ids)  # 每个起点占据len_t*n行
-                for di in range(self.len_row):
-                    for dj in range(self.len_column):
-                        destination_index = (di * self.len_column + dj) * len_time  # 每个终点占据len_t行
-                        index = origin_index + destination_index
-                        # print(index, index + len_time)
-                        # print((oi, oj), (di, dj))
-                        # print(oi * self.len_column + oj, di * self.len_column + dj)
-                        data[oi * self.len_column + oj][di * self.len_column + dj] = df[index:index + len_time].values
+        # 每个起点格子占据len_t*n行，其中每个终点格子占据len_t行，格子按行优先顺序编号
+        data = df.reshape(len(self.geo_ids), len(self.geo_ids), len_time, feature_dim)
         data = data.transpose((2, 0, 1, 3))  # (len_time, num_grids, num_grids, feature_dim)
         self._logger.info("Loaded file " + filename + '.gridod' + ', shape=' + str(data.shape))
         return data
@@ -467,19 +502,22 @@ class TrafficStateDataset(AbstractDataset):
         """
         # 加载数据集
         self._logger.info("Loading file " + filename + '.gridod')
-        gridodfile = pd.read_csv(self.data_path + filename + '.gridod')
         if self.data_col != '':  # 根据指定的列加载数据集
             if isinstance(self.data_col, list):
                 data_col = self.data_col.copy()
             else:  # str
                 data_col = [self.data_col].copy()
+            # 只解析需要的列，数据列直接按float32解析
+            data_dtype = {col: np.float32 for col in data_col}
             data_col.insert(0, 'time')
             data_col.insert(1, 'origin_row_id')
             data_col.insert(2, 'origin_column_id')
             data_col.insert(3, 'destination_row_id')
             data_col.insert(4, 'destination_column_id')
-            gridodfile = gridodfile[data_col]
+            gridodfile = pd.read_csv(self.data_path + filename + '.gridod',
+                                     usecols=data_col, dtype=data_dtype)[data_col]
         else:  # 不指定则加载所有列
+            gridodfile = pd.read_csv(self.data_path + filename + '.gridod')
             gridodfile = gridodfile[gridodfile.columns[2:]]  # 从time列开始所有列
         # 求时间序列
         self.timesolts = list(gridodfile['time'][:int(gridodfile.shape[0] / len(self.geo_ids) / len(self.geo_ids))])
@@ -491,18 +529,10 @@ class TrafficStateDataset(AbstractDataset):
                 self.idx_of_timesolts[_ts] = idx
         # 转6-d数组
         feature_dim = len(gridodfile.columns) - 5
-        df = gridodfile[gridodfile.columns[-feature_dim:]]
+        df = gridodfile[gridodfile.columns[-feature_dim:]].to_numpy(dtype=np.float32)
         len_time = len(self.timesolts)
-        data = np.zeros((self.len_row, self.len_column, self.len_row, self.len_column, len_time, feature_dim))
-        for oi in range(self.len_row):
-            for oj in range(self.len_column):
-                origin_index = (oi * self.len_column + oj) * len_time * len(self.geo_ids)  # 每个起点占据len_t*n行
-                for di in range(self.len_row):
-                    for dj in range(self.len_column):
-                        destination_index = (di * self.len_column + dj) * len_time  # 每个终点占据len_t行
-                        index = origin_index + destination_index
-                        # print(index, index + len_time)
-                        data[oi][oj][di][dj] = df[index:index + len_time].values
+        # 每个起点格子占据len_t*n行，其中每个终点格子占据len_t行，格子按行优先顺序编号
+        data = df.reshape(self.len_row, self.len_column, self.len_row, self.len_column, len_time, feature_dim)
         data = data.transpose((4, 0, 1, 2, 3, 5))  # (len_time, len_row, len_column, len_row, len_column, feature_dim)
         self._logger.info("Loaded file " + filename + '.gridod' + ', shape=' + str(data.shape))
         return data
@@ -572,13 +602,13 @@ class TrafficStateDataset(AbstractDataset):
         data_list = [df]
         if self.add_time_in_day and not is_time_nan:
             time_ind = (self.timesolts - self.timesolts.astype("datetime64[D]")) / np.timedelta64(1, "D")
-            time_in_day = np.tile(time_ind, [1, num_nodes, 1]).transpose((2, 1, 0))
+            time_in_day = np.broadcast_to(time_ind.astype(np.float32).reshape(-1, 1, 1),
+                                          (num_samples, num_nodes, 1))
             data_list.append(time_in_day)
         if self.add_day_in_week and not is_time_nan:
-            dayofweek = []
-            for day in self.timesolts.astype("datetime64[D]"):
-                dayofweek.append(datetime.datetime.strptime(str(day), '%Y-%m-%d').weekday())
-            day_in_week = np.zeros(shape=(num_samples, num_nodes, 7))
+            # 1970-01-01是星期四，由距其的天数直接得到星期几(0表示星期一)
+            dayofweek = (self.timesolts.astype("datetime64[D]").astype(np.int64) + 3) % 7
+            day_in_week = np.zeros(shape=(num_samples, num_nodes, 7), dtype=np.float32)
             day_in_week[np.arange(num_samples), :, dayofweek] = 1
             data_list.append(day_in_week)
         # 外部数据集
@@ -589,17 +619,13 @@ class TrafficStateDataset(AbstractDataset):
                     ts_index = self.idx_of_ext_timesolts[ts]
                     indexs.append(ts_index)
                 select_data = ext_data[indexs]  # T * ext_dim 选出所需要的时间步的数据
-                for i in range(select_data.shape[1]):
-                    data_ind = select_data[:, i]
-                    data_ind = np.tile(data_ind, [1, num_nodes, 1]).transpose((2, 1, 0))
-                    data_list.append(data_ind)
+                data_list.append(np.broadcast_to(select_data.astype(np.float32)[:, np.newaxis, :],
+                                                 (num_samples, num_nodes, select_data.shape[1])))
             else:  # 没有给出具体的时间戳，只有外部数据跟原数据等长才能默认对接到一起
                 if ext_data.shape[0] == df.shape[0]:
                     select_data = ext_data  # T * ext_dim
-                    for i in range(select_data.shape[1]):
-                        data_ind = select_data[:, i]
-                        data_ind = np.tile(data_ind, [1, num_nodes, 1]).transpose((2, 1, 0))
-                        data_list.append(data_ind)
+                    data_list.append(np.broadcast_to(select_data.astype(np.float32)[:, np.newaxis, :],
+                                                     (num_samples, num_nodes, select_data.shape[1])))
         data = np.concatenate(data_list, axis=-1)
         return data
 
@@ -619,13 +645,13 @@ class TrafficStateDataset(AbstractDataset):
         data_list = [df]
         if self.add_time_in_day and not is_time_nan:
             time_ind = (self.timesolts - self.timesolts.astype("datetime64[D]")) / np.timedelta64(1, "D")
-            time_in_day = np.tile(time_ind, [1, len_row, len_column, 1]).transpose((3, 1, 2, 0))
+            time_in_day = np.broadcast_to(time_ind.astype(np.float32).reshape(-1, 1, 1, 1),
+                                          (num_samples, len_row, len_column, 1))
             data_list.append(time_in_day)
         if self.add_day_in_week and not is_time_nan:
-            dayofweek = []
-            for day in self.timesolts.astype("datetime64[D]"):
-                dayofweek.append(datetime.datetime.strptime(str(day), '%Y-%m-%d').weekday())
-            day_in_week = np.zeros(shape=(num_samples, len_row, len_column, 7))
+            # 1970-01-01是星期四，由距其的天数直接得到星期几(0表示星期一)
+            dayofweek = (self.timesolts.astype("datetime64[D]").astype(np.int64) + 3) % 7
+            day_in_week = np.zeros(shape=(num_samples, len_row, len_column, 7), dtype=np.float32)
             day_in_week[np.arange(num_samples), :, :, dayofweek] = 1
             data_list.append(day_in_week)
         # 外部数据集
@@ -636,17 +662,13 @@ class TrafficStateDataset(AbstractDataset):
                     ts_index = self.idx_of_ext_timesolts[ts]
                     indexs.append(ts_index)
                 select_data = ext_data[indexs]  # T * ext_dim 选出所需要的时间步的数据
-                for i in range(select_data.shape[1]):
-                    data_ind = select_data[:, i]
-                    data_ind = np.tile(data_ind, [1, len_row, len_column, 1]).transpose((3, 1, 2, 0))
-                    data_list.append(data_ind)
+                data_list.append(np.broadcast_to(select_data.astype(np.float32)[:, np.newaxis, np.newaxis, :],
+                                                 (num_samples, len_row, len_column, select_data.shape[1])))
             else:  # 没有给出具体的时间戳，只有外部数据跟原数据等长才能默认对接到一起
                 if ext_data.shape[0] == df.shape[0]:
                     select_data = ext_data  # T * ext_dim
-                    for i in range(select_data.shape[1]):
-                        data_ind = select_data[:, i]
-                        data_ind = np.tile(data_ind, [1, len_row, len_column, 1]).transpose((3, 1, 2, 0))
-                        data_list.append(data_ind)
+                    data_list.append(np.broadcast_to(select_data.astype(np.float32)[:, np.newaxis, np.newaxis, :],
+                                                     (num_samples, len_row, len_column, select_data.shape[1])))
         data = np.concatenate(data_list, axis=-1)
         return data
 
@@ -668,14 +690,13 @@ class TrafficStateDataset(AbstractDataset):
         data_list = [df]
         if self.add_time_in_day and not is_time_nan:
             time_ind = (self.timesolts - self.timesolts.astype("datetime64[D]")) / np.timedelta64(1, "D")
-            time_in_day = np.tile(time_ind, [1, len_row, len_column, len_row, len_column, 1]).\
-                transpose((5, 1, 2, 3, 4, 0))
+            time_in_day = np.broadcast_to(time_ind.astype(np.float32).reshape(-1, 1, 1, 1, 1, 1),
+                                          (num_samples, len_row, len_column, len_row, len_column, 1))
             data_list.append(time_in_day)
         if self.add_day_in_week and not is_time_nan:
-            dayofweek = []
-            for day in self.timesolts.astype("datetime64[D]"):
-                dayofweek.append(datetime.datetime.strptime(str(day), '%Y-%m-%d').weekday())
-            day_in_week = np.zeros(shape=(num_samples, len_row, len_column, len_row, len_column, 7))
+            # 1970-01-01是星期四，由距其的天数直接得到星期几(0表示星期一)
+            dayofweek = (self.timesolts.astype("datetime64[D]").astype(np.int64) + 3) % 7
+            day_in_week = np.zeros(shape=(num_samples, len_row, len_column, len_row, len_column, 7), dtype=np.float32)
             day_in_week[np.arange(num_samples), :, :, :, :, dayofweek] = 1
             data_list.append(day_in_week)
         # 外部数据集
@@ -686,19 +707,15 @@ class TrafficStateDataset(AbstractDataset):
                     ts_index = self.idx_of_ext_timesolts[ts]
                     indexs.append(ts_index)
                 select_data = ext_data[indexs]  # T * ext_dim 选出所需要的时间步的数据
-                for i in range(select_data.shape[1]):
-                    data_ind = select_data[:, i]
-                    data_ind = np.tile(data_ind, [1, len_row, len_column, len_row, len_column, 1]). \
-                        transpose((5, 1, 2, 3, 4, 0))
-                    data_list.append(data_ind)
+                data_list.append(np.broadcast_to(
+                    select_data.astype(np.float32).reshape(num_samples, 1, 1, 1, 1, -1),
+                    (num_samples, len_row, len_column, len_row, len_column, select_data.shape[1])))
             else:  # 没有给出具体的时间戳，只有外部数据跟原数据等长才能默认对接到一起
                 if ext_data.shape[0] == df.shape[0]:
                     select_data = ext_data  # T * ext_dim
-                    for i in range(select_data.shape[1]):
-                        data_ind = select_data[:, i]
-                        data_ind = np.tile(data_ind, [1, len_row, len_column, len_row, len_column, 1]). \
-                            transpose((5, 1, 2, 3, 4, 0))
-                        data_list.append(data_ind)
+                    data_list.append(np.broadcast_to(
+                        select_data.astype(np.float32).reshape(num_samples, 1, 1, 1, 1, -1),
+                        (num_samples, len_row, len_column, len_row, len_column, select_data.shape[1])))
         data = np.concatenate(data_list, axis=-1)
         return data
 
@@ -721,16 +738,12 @@ class TrafficStateDataset(AbstractDataset):
         # 未来时间窗口长度 取决于self.output_window
         y_offsets = np.sort(np.arange(1, self.output_window + 1, 1))
 
-        x, y = [], []
         min_t = abs(min(x_offsets))
         max_t = abs(num_samples - abs(max(y_offsets)))
-        for t in range(min_t, max_t):
-            x_t = df[t + x_offsets, ...]
-            y_t = df[t + y_offsets, ...]
-            x.append(x_t)
-            y.append(y_t)
-        x = np.stack(x, axis=0)
-        y = np.stack(y, axis=0)
+        # 所有窗口的时间下标一次性构造，(epoch_size, 1) + (input_length,) -> (epoch_size, input_length)
+        t = np.arange(min_t, max_t).reshape(-1, 1)
+        x = df[t + x_offsets, ...]
+        y = df[t + y_offsets, ...]
         return x, y
 
     def _generate_data(self):
@@ -762,8 +775,12 @@ class TrafficStateDataset(AbstractDataset):
             # y: (num_samples, output_length, ..., output_dim)
             x_list.append(x)
             y_list.append(y)
-        x = np.concatenate(x_list)
-        y = np.concatenate(y_list)
+        if len(x_list) == 1:  # 只有一个数据文件时直接使用，np.concatenate会再复制一份
+            x, y = x_list[0], y_list[0]
+        else:
+            x = np.concatenate(x_list)
+            y = np.concatenate(y_list)
+        del x_list, y_list
         self._logger.info("Dataset created")
         self._logger.info("x shape: " + str(x.shape) + ", y shape: " + str(y.shape))
         return x, y
@@ -802,9 +819,7 @@ class TrafficStateDataset(AbstractDataset):
         self._logger.info("test\t" + "x: " + str(x_test.shape) + ", y: " + str(y_test.shape))
 
         if self.cache_dataset:
-            ensure_dir(self.cache_file_folder)
-            np.savez_compressed(
-                self.cache_file_name,
+            self._save_cache(
                 x_train=x_train,
                 y_train=y_train,
                 x_test=x_test,
@@ -812,7 +827,6 @@ class TrafficStateDataset(AbstractDataset):
                 x_val=x_val,
                 y_val=y_val,
             )
-            self._logger.info('Saved at ' + self.cache_file_name)
         return x_train, y_train, x_val, y_val, x_test, y_test
 
     def _generate_train_val_test(self):
@@ -845,42 +859,82 @@ class TrafficStateDataset(AbstractDataset):
                 y_test: (num_samples, input_length, ..., feature_dim)
         """
         self._logger.info('Loading ' + self.cache_file_name)
-        cat_data = np.load(self.cache_file_name)
-        x_train = cat_data['x_train']
-        y_train = cat_data['y_train']
-        x_test = cat_data['x_test']
-        y_test = cat_data['y_test']
-        x_val = cat_data['x_val']
-        y_val = cat_data['y_val']
+        cat_data = self._load_cache()
+        # 兼容旧版本以float64保存的缓存
+        x_train = cat_data['x_train'].astype(np.float32, copy=False)
+        y_train = cat_data['y_train'].astype(np.float32, copy=False)
+        x_test = cat_data['x_test'].astype(np.float32, copy=False)
+        y_test = cat_data['y_test'].astype(np.float32, copy=False)
+        x_val = cat_data['x_val'].astype(np.float32, copy=False)
+        y_val = cat_data['y_val'].astype(np.float32, copy=False)
         self._logger.info("train\t" + "x: " + str(x_train.shape) + ", y: " + str(y_train.shape))
         self._logger.info("eval\t" + "x: " + str(x_val.shape) + ", y: " + str(y_val.shape))
         self._logger.info("test\t" + "x: " + str(x_test.shape) + ", y: " + str(y_test.shape))
         return x_train, y_train, x_val, y_val, x_test, y_test
 
-    def _get_scalar(self, scaler_type, x_train, y_train):
+    def _get_cache_file_name(self, name):
+        """
+        缓存中每个数组单独保存为一个.npy文件，文件名由`self.cache_file_name`和数组名拼接得到
+
+        Args:
+            name(str): 数组名
+
+        Returns:
+            str: .npy文件路径
+        """
+        return os.path.splitext(self.cache_file_name)[0] + '_' + name + '.npy'
+
+    def _save_cache(self, **arrays):
+        """
+        将数组分别保存为未压缩的.npy文件，便于加载时直接内存映射,
+        全部写完后再写`self.cache_file_name`，其中只记录数组名，作为缓存已完整写入的标记
+
+        Args:
+            **arrays: 数组名到数组的映射
+        """
+        ensure_dir(self.cache_file_folder)
+        for name, array in arrays.items():
+            np.save(self._get_cache_file_name(name), array)
+        np.savez(self.cache_file_name, cache_names=np.array(list(arrays.keys())))
+        self._logger.info('Saved at ' + self.cache_file_name)
+
+    def _load_cache(self):
+        """
+        加载`self._save_cache()`保存的缓存，.npy文件以copy-on-write方式内存映射，按需从磁盘读入,
+        对数组的原地修改（如归一化）不会写回缓存文件
+
+        Returns:
+            dict: 数组名到数组的映射
+        """
+        cat_data = np.load(self.cache_file_name)
+        if 'cache_names' not in cat_data.files:  # 旧版本直接保存在.npz文件中的缓存，保持打开以按需读取数组
+            return cat_data
+        with cat_data:
+            cache_names = list(cat_data['cache_names'])
+        return {name: np.load(self._get_cache_file_name(name), mmap_mode='c') for name in cache_names}
+
+    def _get_scalar(self, scaler_type, x_train):
         """
-        根据全局参数`scaler_type`选择数据归一化方法
+        根据全局参数`scaler_type`选择数据归一化方法，归一化参数只在训练数据X上统计
 
         Args:
+            scaler_type(str): 归一化方法
             x_train: 训练数据X
-            y_train: 训练数据y
 
         Returns:
             Scaler: 归一化对象
         """
         if scaler_type == "normal":
-            scaler = NormalScaler(maxx=max(x_train.max(), y_train.max()))
+            scaler = NormalScaler(maxx=x_train.max())
             self._logger.info('NormalScaler max: ' + str(scaler.max))
         elif scaler_type == "standard":
             scaler = StandardScaler(mean=x_train.mean(), std=x_train.std())
             self._logger.info('StandardScaler mean: ' + str(scaler.mean) + ', std: ' + str(scaler.std))
         elif scaler_type == "minmax01":
-            scaler = MinMax01Scaler(
-                maxx=max(x_train.max(), y_train.max()), minn=min(x_train.min(), y_train.min()))
+            scaler = MinMax01Scaler(maxx=x_train.max(), minn=x_train.min())
             self._logger.info('MinMax01Scaler max: ' + str(scaler.max) + ', min: ' + str(scaler.min))
         elif scaler_type == "minmax11":
-            scaler = MinMax11Scaler(
-                maxx=max(x_train.max(), y_train.max()), minn=min(x_train.min(), y_train.min()))
+            scaler = MinMax11Scaler(maxx=x_train.max(), minn=x_train.min())
             self._logger.info('MinMax11Scaler max: ' + str(scaler.max) + ', min: ' + str(scaler.min))
         elif scaler_type == "log":
             scaler = LogScaler()
@@ -913,29 +967,34 @@ class TrafficStateDataset(AbstractDataset):
         # 数据归一化
         self.feature_dim = x_train.shape[-1]
         self.ext_dim = self.feature_dim - self.output_dim
-        self.scaler = self._get_scalar(self.scaler_type,
-                                       x_train[..., :self.output_dim], y_train[..., :self.output_dim])
-        self.ext_scaler = self._get_scalar(self.ext_scaler_type,
-                                           x_train[..., self.output_dim:], y_train[..., self.output_dim:])
-        x_train[..., :self.output_dim] = self.scaler.transform(x_train[..., :self.output_dim])
-        y_train[..., :self.output_dim] = self.scaler.transform(y_train[..., :self.output_dim])
-        x_val[..., :self.output_dim] = self.scaler.transform(x_val[..., :self.output_dim])
-        y_val[..., :self.output_dim] = self.scaler.transform(y_val[..., :self.output_dim])
-        x_test[..., :self.output_dim] = self.scaler.transform(x_test[..., :self.output_dim])
-        y_test[..., :self.output_dim] = self.scaler.transform(y_test[..., :self.output_dim])
+        self.scaler = self._get_scalar(self.scaler_type, x_train[..., :self.output_dim])
+        self.ext_scaler = self._get_scalar(self.ext_scaler_type, x_train[..., self.output_dim:])
+        # 在切片视图上原地归一化，避免为每个数据集分配同样大小的临时数组
+        self.scaler.transform_inplace(x_train[..., :self.output_dim])
+        self.scaler.transform_inplace(y_train[..., :self.output_dim])
+        self.scaler.transform_inplace(x_val[..., :self.output_dim])
+        self.scaler.transform_inplace(y_val[..., :self.output_dim])
+        self.scaler.transform_inplace(x_test[..., :self.output_dim])
+        self.scaler.transform_inplace(y_test[..., :self.output_dim])
         if self.normal_external:
-            x_train[..., self.output_dim:] = self.ext_scaler.transform(x_train[..., self.output_dim:])
-            y_train[..., self.output_dim:] = self.ext_scaler.transform(y_train[..., self.output_dim:])
-            x_val[..., self.output_dim:] = self.ext_scaler.transform(x_val[..., self.output_dim:])
-            y_val[..., self.output_dim:] = self.ext_scaler.transform(y_val[..., self.output_dim:])
-            x_test[..., self.output_dim:] = self.ext_scaler.transform(x_test[..., self.output_dim:])
-            y_test[..., self.output_dim:] = self.ext_scaler.transform(y_test[..., self.output_dim:])
-        # 把训练集的X和y聚合在一起成为list，测试集验证集同理
+            self.ext_scaler.transform_inplace(x_train[..., self.output_dim:])
+            self.ext_scaler.transform_inplace(y_train[..., self.output_dim:])
+            self.ext_scaler.transform_inplace(x_val[..., self.output_dim:])
+            self.ext_scaler.transform_inplace(y_val[..., self.output_dim:])
+            self.ext_scaler.transform_inplace(x_test[..., self.output_dim:])
+            self.ext_scaler.transform_inplace(y_test[..., self.output_dim:])
+        # 默认保持numpy数组，DataLoader的子进程传回numpy切片时只复制切片本身，
+        # 而Tensor切片会把整个底层存储搬到共享内存中，每个子进程都会复制一份数据集
+        # 如果显存足够，可以设置`load_data_to_device`直接把整个数据集放到device上，避免每个batch都拷贝到显存
+        if self.load_data_to_device and self.device.type != 'cpu':
+            x_train, y_train, x_val, y_val, x_test, y_test = \
+                [self._to_tensor(data) for data in (x_train, y_train, x_val, y_val, x_test, y_test)]
+        # 把训练集的X和y聚合在一起成为ArrayDataset，测试集验证集同理
         # x_train/y_train: (num_samples, input_length, ..., feature_dim)
-        # train_data(list): train_data[i]是一个元组，由x_train[i]和y_train[i]组成
-        train_data = list(zip(x_train, y_train))
-        eval_data = list(zip(x_val, y_val))
-        test_data = list(zip(x_test, y_test))
+        # train_data[i]是一个元组，由x_train[i]和y_train[i]组成
+        train_data = ArrayDataset(x_train, y_train)
+        eval_data = ArrayDataset(x_val, y_val)
+        test_data = ArrayDataset(x_test, y_test)
         # 转Dataloader
         self.train_dataloader, self.eval_dataloader, self.test_dataloader = \
             generate_dataloader(train_data, eval_data, test_data, self.feature_name,
@@ -943,6 +1002,18 @@ class TrafficStateDataset(AbstractDataset):
         self.num_batches = len(self.train_dataloader)
         return self.train_dataloader, self.eval_dataloader, self.test_dataloader
 
+    def _to_tensor(self, data):
+        """
+        将numpy数组转换为Tensor并放到self.device上，用于全局参数`load_data_to_device`为True的情况
+
+        Args:
+            data(np.ndarray): 数据数组
+
+        Returns:
+            torch.Tensor: self.device上的数据Tensor
+        """
+        return torch.from_numpy(np.ascontiguousarray(data)).to(self.device)
+
     def get_data_feature(self):
         """
         返回数据集特征，子类必须实现这个函数，返回必要的特征
@@ -13,3 +13,28 @@ class ListDataset(Dataset):
 
     def __len__(self):
         return len(self.data)
+
+
+class ArrayDataset(Dataset):
+    def __init__(self, *arrays):
+        """
+        arrays: 若干个第一维长度相同的数组，第 i 个样本由每个数组的第 i 个元素组成，
+        直接按下标访问数组，不需要先 zip 成 list
+        """
+        self.arrays = arrays
+        self.num_samples = len(arrays[0])
+        self.num_padding = 0
+
+    def pad_with_last_sample(self, batch_size):
+        """
+        使用最后一个样本补齐到 batch_size 的整数倍，只修改长度，不复制数据
+        """
+        self.num_padding = (batch_size - (self.num_samples % batch_size)) % batch_size
+
+    def __getitem__(self, index):
+        # 超出原始长度的下标都对应最后一个样本
+        index = min(index, self.num_samples - 1)
+        return tuple(array[index] for array in self.arrays)
+
+    def __len__(self):
+        return self.num_samples + self.num_padding
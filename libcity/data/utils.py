@@ -3,7 +3,7 @@ import numpy as np
 from torch.utils.data import DataLoader
 import copy
 
-from libcity.data.list_dataset import ListDataset
+from libcity.data.list_dataset import ListDataset, ArrayDataset
 from libcity.data.batch import Batch
 
 
@@ -32,9 +32,12 @@ def generate_dataloader(train_data, eval_data, test_data, feature_name,
     create dataloader(train/test/eval)
 
     Args:
-        train_data(list of input): 训练数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target
-        eval_data(list of input): 验证数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target
-        test_data(list of input): 测试数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target
+        train_data(list of input): 训练数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target，
+            也可以是 ArrayDataset
+        eval_data(list of input): 验证数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target，
+            也可以是 ArrayDataset
+        test_data(list of input): 测试数据，data 中每个元素是模型单次的输入，input 是一个 list，里面存放单次输入和 target，
+            也可以是 ArrayDataset
         feature_name(dict): 描述上面 input 每个元素对应的特征名, 应保证len(feature_name) = len(input)
         batch_size(int): batch_size
         num_workers(int): num_workers
@@ -49,25 +52,37 @@ def generate_dataloader(train_data, eval_data, test_data, feature_name,
             eval_dataloader: Dataloader composed of Batch (class) \n
             test_dataloader: Dataloader composed of Batch (class)
     """
-    if pad_with_last_sample:
-        num_padding = (batch_size - (len(train_data) %
-                                     batch_size)) % batch_size
-        data_padding = np.repeat(train_data[-1:], num_padding, axis=0)
-        train_data = np.concatenate([train_data, data_padding], axis=0)
-        num_padding = (batch_size - (len(eval_data) % batch_size)) % batch_size
-        data_padding = np.repeat(eval_data[-1:], num_padding, axis=0)
-        eval_data = np.concatenate([eval_data, data_padding], axis=0)
-        num_padding = (batch_size - (len(test_data) % batch_size)) % batch_size
-        data_padding = np.repeat(test_data[-1:], num_padding, axis=0)
-        test_data = np.concatenate([test_data, data_padding], axis=0)
-    train_dataset = ListDataset(train_data)
-    eval_dataset = ListDataset(eval_data)
-    test_dataset = ListDataset(test_data)
+    if isinstance(train_data, ArrayDataset):
+        # 直接按下标访问数组，补齐时不复制数据
+        if pad_with_last_sample:
+            train_data.pad_with_last_sample(batch_size)
+            eval_data.pad_with_last_sample(batch_size)
+            test_data.pad_with_last_sample(batch_size)
+        train_dataset, eval_dataset, test_dataset = train_data, eval_data, test_data
+    else:
+        if pad_with_last_sample:
+            num_padding = (batch_size - (len(train_data) %
+                                         batch_size)) % batch_size
+            data_padding = np.repeat(train_data[-1:], num_padding, axis=0)
+            train_data = np.concatenate([train_data, data_padding], axis=0)
+            num_padding = (batch_size - (len(eval_data) % batch_size)) % batch_size
+            data_padding = np.repeat(eval_data[-1:], num_padding, axis=0)
+            eval_data = np.concatenate([eval_data, data_padding], axis=0)
+            num_padding = (batch_size - (len(test_data) % batch_size)) % batch_size
+            data_padding = np.repeat(test_data[-1:], num_padding, axis=0)
+            test_data = np.concatenate([test_data, data_padding], axis=0)
+        train_dataset = ListDataset(train_data)
+        eval_dataset = ListDataset(eval_data)
+        test_dataset = ListDataset(test_data)
+
+    # ArrayDataset 返回的是数组的切片，Batch 不会原地修改它们，不需要 deepcopy
+    # （对 Tensor 切片 deepcopy 会复制整个底层存储）
+    copy_item = not isinstance(train_dataset, ArrayDataset)
 
     def collator(indices):
         batch = Batch(feature_name, pad_item, pad_max_len)
         for item in indices:
-            batch.append(copy.deepcopy(item))
+            batch.append(copy.deepcopy(item) if copy_item else item)
         batch.padding()
         return batch
     train_dataloader = DataLoader(dataset=train_dataset, batch_size=batch_size,
@@ -18,6 +18,19 @@ class Scaler:
         """
         raise NotImplementedError("Transform not implemented")
 
+    def transform_inplace(self, data):
+        """
+        数据原地归一化接口，直接修改`data`而不分配新数组，`data`可以是大数组的切片视图
+
+        Args:
+            data(np.ndarray): 归一化前的数据
+
+        Returns:
+            np.ndarray: 归一化后的数据（即`data`本身）
+        """
+        data[...] = self.transform(data)
+        return data
+
     def inverse_transform(self, data):
         """
         数据逆归一化接口
@@ -39,6 +52,9 @@ class NoneScaler(Scaler):
     def transform(self, data):
         return data
 
+    def transform_inplace(self, data):
+        return data
+
     def inverse_transform(self, data):
         return data
 
@@ -55,6 +71,10 @@ class NormalScaler(Scaler):
     def transform(self, data):
         return data / self.max
 
+    def transform_inplace(self, data):
+        data /= self.max
+        return data
+
     def inverse_transform(self, data):
         return data * self.max
 
@@ -72,6 +92,11 @@ class StandardScaler(Scaler):
     def transform(self, data):
         return (data - self.mean) / self.std
 
+    def transform_inplace(self, data):
+        data -= self.mean
+        data /= self.std
+        return data
+
     def inverse_transform(self, data):
         return (data * self.std) + self.mean
 
@@ -89,6 +114,11 @@ class MinMax01Scaler(Scaler):
     def transform(self, data):
         return (data - self.min) / (self.max - self.min)
 
+    def transform_inplace(self, data):
+        data -= self.min
+        data /= (self.max - self.min)
+        return data
+
     def inverse_transform(self, data):
         return data * (self.max - self.min) + self.min
 
@@ -107,6 +137,12 @@ class MinMax11Scaler(Scaler):
     def transform(self, data):
         return ((data - self.min) / (self.max - self.min)) * 2. - 1.
 
+    def transform_inplace(self, data):
+        data -= self.min
+        data *= 2. / (self.max - self.min)
+        data -= 1.
+        return data
+
     def inverse_transform(self, data):
         return ((data + 1.) / 2.) * (self.max - self.min) + self.min
 
@@ -123,5 +159,10 @@ class LogScaler(Scaler):
     def transform(self, data):
         return np.log(data + self.eps)
 
+    def transform_inplace(self, data):
+        data += self.eps
+        np.log(data, out=data)
+        return data
+
     def inverse_transform(self, data):
         return np.exp(data) - self.eps
@@ -0,0 +1,23 @@
+import numpy as np
+from libcity.data.list_dataset import ArrayDataset
+
+
+def test_array_dataset():
+    x = np.arange(5 * 3 * 2, dtype=np.float32).reshape((5, 3, 2))
+    y = np.arange(5 * 4, dtype=np.float32).reshape((5, 4))
+    dataset = ArrayDataset(x, y)
+    assert len(dataset) == 5
+    for i in range(5):
+        item_x, item_y = dataset[i]
+        assert np.array_equal(item_x, x[i])
+        assert np.array_equal(item_y, y[i])
+    # 补齐到 batch_size 的整数倍，多出的下标都返回最后一个样本
+    dataset.pad_with_last_sample(4)
+    assert len(dataset) == 8
+    for i in range(5, 8):
+        item_x, item_y = dataset[i]
+        assert np.array_equal(item_x, x[-1])
+        assert np.array_equal(item_y, y[-1])
+    # 已经是整数倍时不补齐
+    dataset.pad_with_last_sample(5)
+    assert len(dataset) == 5
@@ -0,0 +1,19 @@
+import numpy as np
+from libcity.utils import NoneScaler, NormalScaler, StandardScaler, MinMax01Scaler, MinMax11Scaler, LogScaler
+
+
+def test_transform_inplace():
+    data = np.random.rand(16, 8, 2).astype(np.float32) + 0.5
+    scalers = [
+        NoneScaler(),
+        NormalScaler(maxx=data.max()),
+        StandardScaler(mean=data.mean(), std=data.std()),
+        MinMax01Scaler(minn=data.min(), maxx=data.max()),
+        MinMax11Scaler(minn=data.min(), maxx=data.max()),
+        LogScaler(),
+    ]
+    for scaler in scalers:
+        copied = data.copy()
+        res = scaler.transform_inplace(copied)
+        assert res is copied, type(scaler).__name__
+        assert np.allclose(res, scaler.transform(data), atol=1e-6), type(scaler).__name__